@@ -1,20 +1,22 @@
 import streamlit as st
 import pandas as pd
 import sqlite3
+import smtplib
 import time
 import altair as alt
 import plotly.express as px
 import os
-from io import BytesIO
-from datetime import datetime
-from jinja2 import Template
+from datetime import datetime, timedelta
 import asyncio
 import warnings
 
-import yagmail
 from utils.seamless_ai import fetch_seamless_leads
-from utils.email_sender import send_email_smtp
-from utils.appointment_notifier import get_bookings
+from utils.email_sender import send_email_smtp, open_smtp, send_raw_email
+from utils.bulk_render import render_messages
+from utils.template_build import load_template, compile_template_source, read_images
+from utils.appointment_notifier import get_bookings, fetch_bookings
+from utils.async_http import submit
+from utils.log_archive import archive_old_logs, read_archived_logs
 from utils.gmass_api import get_quota, get_campaign_status, pause_campaign, resume_campaign, cancel_campaign
 from dotenv import load_dotenv
 
@@ -55,6 +57,8 @@ from utils.appointment_notifier import get_bookings
 # Database Functions (SQLite)
 # -------------------------
 DB_FILE = "clean_earth_leads.db"
+# Logs older than this many days move from SQLite to the Parquet archive
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "90"))
 
 def init_db():
     conn = sqlite3.connect(DB_FILE)
@@ -71,6 +75,7 @@ def init_db():
         )
         """
     )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_email_logs_timestamp ON email_logs (timestamp)")
     conn.commit()
     conn.close()
 
@@ -84,13 +89,42 @@ def log_email(recipient, subject, status, error=""):
     conn.commit()
     conn.close()
 
-def fetch_email_logs():
+def fetch_email_logs(start=None, end=None):
+    """
+    Email logs between start and end (inclusive dates), spanning the live
+    table and any archived partitions that overlap the range.
+    """
+    query = "SELECT * FROM email_logs"
+    clauses, params = [], []
+    if start:
+        clauses.append("timestamp >= ?")
+        params.append(start.strftime("%Y-%m-%d"))
+    if end:
+        clauses.append("timestamp < ?")
+        params.append((end + timedelta(days=1)).strftime("%Y-%m-%d"))
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+
     conn = sqlite3.connect(DB_FILE)
-    df = pd.read_sql_query("SELECT * FROM email_logs ORDER BY timestamp DESC", conn)
+    df = pd.read_sql_query(query, conn, params=params)
     conn.close()
-    return df
+
+    # skip the archive entirely when the range only covers hot data; the
+    # retention cutoff falls partway through its day, so that day counts as archived
+    if start is None or start <= (datetime.utcnow() - timedelta(days=LOG_RETENTION_DAYS)).date():
+        archived = read_archived_logs(start, end)
+        if not archived.empty:
+            # an interrupted retention run can leave rows in both places
+            df = pd.concat([df, archived], ignore_index=True).drop_duplicates(subset="id")
+    return df.sort_values("timestamp", ascending=False, ignore_index=True)
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def run_log_retention():
+    """Archive old email logs at most once an hour per server process."""
+    return archive_old_logs(DB_FILE, LOG_RETENTION_DAYS)
 
 init_db()
+run_log_retention()
 
 # -------------------------
 # Utility: Sentiment Analysis
@@ -348,14 +382,14 @@ elif page == "Email Campaign":
         sender_password = st.text_input("Gmail App Password", type="password")
     subject = st.text_input("Email Subject", "Greetings from Clean Earth")
 
-    # Load HTML template
+    # Load HTML template (compiled once: CSS inlined, local images content-hashed, minified)
     tpl_path = os.path.join("Template", "email.html")
-    tpl_str = open(tpl_path, "r", encoding="utf-8").read()
+    compiled = load_template(tpl_path)
 
     if st.checkbox("Use custom HTML template?"):
         uploaded = st.file_uploader("Upload HTML", type="html")
         if uploaded:
-            tpl_str = uploaded.read().decode("utf-8")
+            compiled = compile_template_source(uploaded.getvalue().decode("utf-8"))
 
     # Optional attachment
     file_attach = st.file_uploader(
@@ -365,37 +399,47 @@ elif page == "Email Campaign":
     if st.button("Send Emails"):
         total = len(df)
         sent = 0
+        done = 0
         progress = st.progress(0)
 
+        # read the attachment once; workers attach the same bytes to every message
+        attachment = None
+        if file_attach:
+            maintype, _, subtype = (file_attach.type or "application/octet-stream").partition("/")
+            attachment = (file_attach.name, file_attach.getvalue(), maintype, subtype)
+
         # initialize SMTP
-        yag = yagmail.SMTP(user=sender_email, password=sender_password)
-
-        for i, row in df.iterrows():
-            progress.progress((i + 1) / total)
-            to = row.get("Email")
-            if not to or pd.isna(to):
-                continue
-
-            # Render with Jinja (passes CalendlyLink into your <a href="{{ CalendlyLink }}">
-            html_body = Template(tpl_str).render(
-                FirstName    = row.get("First Name", "Friend"),
-                LastName     = row.get("Last Name", ""),
-                Company      = row.get("Company", "your company"),
-                CalendlyLink = "https://calendly.com/clean-earth"
-            )
-
-            # Build contents: HTML + any attachment
-            contents = [html_body]
-            if file_attach:
-                bio = BytesIO(file_attach.read())
-                bio.name = file_attach.name
-                contents.append(bio)
+        try:
+            server = open_smtp(sender_email, sender_password)
+        except Exception as e:
+            st.error(f"❌ Could not connect to Gmail SMTP: {e}")
+            st.stop()
 
+        # Render with Jinja in worker processes (passes CalendlyLink into your <a href="{{ CalendlyLink }}">)
+        # and stream back fully built messages shard by shard
+        try:
+            for shard_rows, messages in render_messages(
+                df, compiled["html"], sender_email, subject,
+                calendly_link="https://calendly.com/clean-earth",
+                attachment=attachment,
+                images=read_images(compiled["images"]),
+            ):
+                for to, message, error in messages:
+                    if error:
+                        st.error(f"❌ Failed to send to {to}: {error}")
+                        continue
+                    try:
+                        server = send_raw_email(server, sender_email, sender_password, to, message)
+                        sent += 1
+                    except Exception as e:
+                        st.error(f"❌ Failed to send to {to}: {e}")
+                done += shard_rows
+                progress.progress(done / total)
+        finally:
             try:
-                yag.send(to=to, subject=subject, contents=contents)
-                sent += 1
-            except Exception as e:
-                st.error(f"❌ Failed to send to {to}: {e}")
+                server.quit()
+            except smtplib.SMTPException:
+                pass
 
         st.success(f"✅ Emails sent to {sent} out of {total} contacts!")
 
@@ -422,7 +466,13 @@ elif page == "Logs":
 # -------------------------
 elif page == "Analytics":
     st.header("Campaign Analytics & Follow-Up")
-    logs = fetch_email_logs()
+    today = datetime.utcnow().date()
+    date_range = st.date_input(
+        "Date range", (today - timedelta(days=LOG_RETENTION_DAYS), today), max_value=today
+    )
+    if len(date_range) != 2:
+        st.stop()
+    logs = fetch_email_logs(*date_range)
     
     if logs.empty:
         st.info("No email logs yet. Send some emails first!")
@@ -456,6 +506,8 @@ elif page == "Analytics":
 # -------------------------
 elif page == "Calendly / Appointments":
     st.header("Schedule Meetings via Calendly")
+    # start the bookings request now so it runs while the rest of the page renders
+    bookings_future = submit(fetch_bookings())
     calendly_link = st.text_input("Your Calendly Link", "https://calendly.com/clean-earth")
     if st.button("Embed Calendly"):
         if "calendly.com" in calendly_link:
@@ -463,10 +515,9 @@ elif page == "Calendly / Appointments":
         else:
             st.error("Please enter a valid Calendly link.")
     st.info("Contacts can book a meeting directly via the embedded Calendly page.")
-    from utils.appointment_notifier import get_bookings
     st.markdown("---")
     st.subheader("Appointment Bookings")
-    bookings = get_bookings()
+    bookings = bookings_future.result()
     if not bookings.empty:
         st.dataframe(bookings)
     else:
@@ -1,32 +1,29 @@
-import requests
 import pandas as pd
 import streamlit as st
 
-def get_bookings():
+from utils.async_http import get_json, run
+
+CALENDLY_EVENTS_URL = "https://api.calendly.com/scheduled_events"
+BOOKINGS_TTL = 60  # seconds
+
+async def fetch_bookings():
     """
-    Retrieve appointment bookings from Calendly's API.
-    
-    To use this integration:
-    1. Generate a personal access token from Calendly and store it in st.secrets (e.g., CALENDLY_ACCESS_TOKEN).
-    2. Ensure your Calendly account has scheduled events.
-    
-    Returns a DataFrame containing real-time booking data.
+    Async version of get_bookings(); identical requests from concurrent
+    sessions share one call and the result is cached for BOOKINGS_TTL seconds.
     """
     try:
         access_token = st.secrets["CALENDLY_ACCESS_TOKEN"]
     except Exception as e:
         return pd.DataFrame()
-    
+
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
     }
-    url = "https://api.calendly.com/scheduled_events"
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
+    status, data = await get_json(CALENDLY_EVENTS_URL, headers=headers, ttl=BOOKINGS_TTL)
+    if status != 200 or not data:
         return pd.DataFrame()
-    
-    data = response.json()
+
     events = []
     for item in data.get("collection", []):
         # Adjust these fields based on Calendly's API response.
@@ -36,3 +33,15 @@ def get_bookings():
             "Status": item.get("status", ""),
         })
     return pd.DataFrame(events)
+
+def get_bookings():
+    """
+    Retrieve appointment bookings from Calendly's API.
+
+    To use this integration:
+    1. Generate a personal access token from Calendly and store it in st.secrets (e.g., CALENDLY_ACCESS_TOKEN).
+    2. Ensure your Calendly account has scheduled events.
+
+    Returns a DataFrame containing real-time booking data.
+    """
+    return run(fetch_bookings())
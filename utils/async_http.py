@@ -0,0 +1,114 @@
+# utils/async_http.py
+import asyncio
+import threading
+import time
+
+import httpx
+
+# One event loop on a daemon thread serves every Streamlit session, so
+# identical requests from concurrent sessions can be coalesced and cached.
+_loop = None
+_loop_lock = threading.Lock()
+_client = None
+
+# (method, url, headers) -> (expires_at, (status_code, data))
+_cache = {}
+# (method, url, headers) -> asyncio.Task for a GET currently on the wire
+_inflight = {}
+# url -> bumped by invalidate() so GETs started earlier don't re-cache stale data
+_generation = {}
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-http", daemon=True).start()
+    return _loop
+
+
+def _key(method: str, url: str, headers: dict | None) -> tuple:
+    return (method, url, tuple(sorted((headers or {}).items())))
+
+
+async def _send(method: str, url: str, headers: dict | None, json=None) -> tuple:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=30)
+    response = await _client.request(method, url, headers=headers, json=json)
+    # error pages are often HTML; callers check the status before using data
+    try:
+        data = response.json() if response.content else None
+    except ValueError:
+        data = None
+    return response.status_code, data
+
+
+async def _get_and_cache(key: tuple, url: str, headers: dict | None, ttl: float) -> tuple:
+    generation = _generation.get(url, 0)
+    try:
+        result = await _send("GET", url, headers)
+        if ttl and result[0] == 200 and _generation.get(url, 0) == generation:
+            now = time.monotonic()
+            # prune expired entries so one-off campaign ids / api keys don't pile up
+            for stale in [k for k, (expires, _) in _cache.items() if expires <= now]:
+                del _cache[stale]
+            _cache[key] = (now + ttl, result)
+        return result
+    finally:
+        if _inflight.get(key) is asyncio.current_task():
+            del _inflight[key]
+
+
+async def get_json(url: str, headers: dict | None = None, ttl: float = 0) -> tuple:
+    """
+    GET url and return (status_code, parsed JSON or None if the body isn't JSON).
+    - A 200 response is cached for ttl seconds (0 disables caching).
+    - Concurrent calls for the same url + headers share one request.
+    Must run on the shared loop; use run() or submit() from sync code.
+    """
+    key = _key("GET", url, headers)
+    hit = _cache.get(key)
+    if hit:
+        if hit[0] > time.monotonic():
+            return hit[1]
+        del _cache[key]
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_get_and_cache(key, url, headers, ttl))
+        _inflight[key] = task
+    return await asyncio.shield(task)
+
+
+async def post_json(url: str, headers: dict | None = None, json=None) -> tuple:
+    """
+    POST to url and return (status_code, parsed JSON or None if the body isn't JSON).
+    POSTs are never cached or coalesced.
+    """
+    return await _send("POST", url, headers, json=json)
+
+
+async def invalidate(url: str):
+    """
+    Drop cached and in-flight GETs for exactly this url. GETs already on the
+    wire still answer their callers but won't write their result to the cache.
+    Must run on the shared loop, like get_json().
+    """
+    _generation[url] = _generation.get(url, 0) + 1
+    for key in [k for k in _cache if k[1] == url]:
+        del _cache[key]
+    for key in [k for k in _inflight if k[1] == url]:
+        del _inflight[key]
+
+
+def submit(coro):
+    """Schedule coro on the shared loop and return a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+def run(coro):
+    """Run coro on the shared loop and block until it finishes."""
+    return submit(coro).result()
+
@@ -0,0 +1,119 @@
+# utils/bulk_render.py
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from email.message import EmailMessage
+from email.policy import SMTP
+from email.utils import formatdate, make_msgid
+
+from jinja2 import Template
+import pandas as pd
+
+# Per-process state, filled once by _init_worker so each shard only renders.
+_template = None
+_sender = None
+_subject = None
+_calendly_link = None
+_attachment = None
+_images = ()
+
+
+def _init_worker(tpl_str, sender_email, subject, calendly_link, attachment, images):
+    global _template, _sender, _subject, _calendly_link, _attachment, _images
+    _template = Template(tpl_str)
+    _sender = sender_email
+    _subject = subject
+    _calendly_link = calendly_link
+    _attachment = attachment
+    _images = images
+
+
+def _build_message(row: dict) -> bytes:
+    html_body = _template.render(
+        FirstName    = row.get("First Name", "Friend"),
+        LastName     = row.get("Last Name", ""),
+        Company      = row.get("Company", "your company"),
+        CalendlyLink = _calendly_link,
+    )
+
+    msg = EmailMessage()
+    msg["From"] = _sender
+    msg["To"] = row["Email"]
+    msg["Subject"] = _subject
+    msg["Date"] = formatdate(localtime=True)
+    msg["Message-ID"] = make_msgid()
+    msg.set_content(html_body, subtype="html")
+    for cid, data, maintype, subtype in _images:
+        msg.add_related(data, maintype=maintype, subtype=subtype, cid=f"<{cid}>")
+
+    if _attachment:
+        name, data, maintype, subtype = _attachment
+        msg.add_attachment(data, maintype=maintype, subtype=subtype, filename=name)
+
+    return msg.as_bytes(policy=SMTP)
+
+
+def _render_shard(rows: list) -> list:
+    """
+    Render one shard of leads into (recipient, raw RFC 5322 bytes, error) tuples.
+    A row that fails to build comes back as (recipient, None, error message)
+    so one bad lead doesn't take the rest of the shard down with it.
+    """
+    out = []
+    for row in rows:
+        to = row.get("Email")
+        if not to or pd.isna(to):
+            continue
+        try:
+            out.append((to, _build_message(row), None))
+        except Exception as e:
+            out.append((to, None, str(e)))
+    return out
+
+
+def render_messages(
+    df: pd.DataFrame,
+    tpl_str: str,
+    sender_email: str,
+    subject: str,
+    calendly_link: str = "https://calendly.com/clean-earth",
+    attachment: tuple | None = None,
+    images: list | None = None,
+    shard_size: int = 500,
+    max_pending: int | None = None,
+    workers: int | None = None,
+):
+    """
+    Render and serialize one email per lead across a pool of processes.
+    - df is sharded into slices of shard_size rows; each worker renders its
+      shard and returns fully built messages as bytes.
+    - At most max_pending shards are in flight at once (default: 2 per worker),
+      so memory stays bounded no matter how large df is.
+    - attachment is an optional (filename, bytes, maintype, subtype) tuple.
+    - images are (cid, bytes, maintype, subtype) tuples sent as inline parts
+      for the cid: references in a compiled template (see utils.template_build).
+    Yields (shard_rows, [(recipient, message_bytes, error), ...]) in lead order,
+    where shard_rows is the number of input rows the shard covered.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    total = len(df)
+
+    # Streamlit is multithreaded, so don't fork it; workers get all state via initargs
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("forkserver"),
+        initializer=_init_worker,
+        initargs=(tpl_str, sender_email, subject, calendly_link, attachment, tuple(images or ())),
+    ) as pool:
+        pending = deque()
+        for start in range(0, total, shard_size):
+            rows = df.iloc[start:start + shard_size].to_dict("records")
+            pending.append((len(rows), pool.submit(_render_shard, rows)))
+            if len(pending) >= max_pending:
+                shard_rows, future = pending.popleft()
+                yield shard_rows, future.result()
+        while pending:
+            shard_rows, future = pending.popleft()
+            yield shard_rows, future.result()
@@ -1,4 +1,6 @@
 # utils/email_sender.py
+import smtplib
+
 import yagmail
 
 def send_email_smtp(
@@ -26,3 +28,34 @@ def send_email_smtp(
 
     # 4) send; yagmail will see the '<' in html_body and set the MIME type to text/html
     yag.send(to=recipient, subject=subject, contents=contents)
+
+
+def open_smtp(sender_email: str, sender_password: str) -> smtplib.SMTP_SSL:
+    """
+    Opens an authenticated Gmail SMTP connection for sending prebuilt messages.
+    Close it with .quit() when the batch is done.
+    """
+    server = smtplib.SMTP_SSL("smtp.gmail.com", 465)
+    server.login(sender_email, sender_password)
+    return server
+
+
+def send_raw_email(
+    server: smtplib.SMTP_SSL,
+    sender_email: str,
+    sender_password: str,
+    recipient: str,
+    message: bytes,
+) -> smtplib.SMTP_SSL:
+    """
+    Sends an already serialized RFC 5322 message (e.g. from utils.bulk_render)
+    over an open connection from open_smtp.
+    - If Gmail has dropped the connection, reconnects and retries once.
+    - Returns the connection to use for the next message.
+    """
+    try:
+        server.sendmail(sender_email, [recipient], message)
+    except smtplib.SMTPServerDisconnected:
+        server = open_smtp(sender_email, sender_password)
+        server.sendmail(sender_email, [recipient], message)
+    return server
@@ -1,7 +1,16 @@
-import requests
+from utils.async_http import get_json, post_json, invalidate, run
 
 BASE_URL = "https://api.gmass.co/v1"
 
+# Cache lifetimes per endpoint, in seconds
+QUOTA_TTL = 300
+STATUS_TTL = 30
+
+async def _post_and_invalidate(url, headers, payload, stale_url):
+    result = await post_json(url, headers=headers, json=payload)
+    await invalidate(stale_url)
+    return result
+
 def send_email_gmass(api_key, subject, body, recipient):
     url = f"{BASE_URL}/send"
     headers = {
@@ -14,35 +23,38 @@ def send_email_gmass(api_key, subject, body, recipient):
         "recipients": [recipient],
         "isHtml": True
     }
-    response = requests.post(url, headers=headers, json=payload)
-    return (response.status_code == 200), response.json()
+    status, data = run(_post_and_invalidate(url, headers, payload, f"{BASE_URL}/quota"))
+    return (status == 200), data
 
-def get_quota(api_key):
+async def fetch_quota(api_key):
     url = f"{BASE_URL}/quota"
     headers = {"Authorization": f"Bearer {api_key}"}
-    response = requests.get(url, headers=headers)
-    return response.json()
+    _, data = await get_json(url, headers=headers, ttl=QUOTA_TTL)
+    return data
 
-def get_campaign_status(api_key, campaign_id):
+async def fetch_campaign_status(api_key, campaign_id):
     url = f"{BASE_URL}/status/{campaign_id}"
     headers = {"Authorization": f"Bearer {api_key}"}
-    response = requests.get(url, headers=headers)
-    return response.json()
+    _, data = await get_json(url, headers=headers, ttl=STATUS_TTL)
+    return data
 
-def pause_campaign(api_key, campaign_id):
-    url = f"{BASE_URL}/pause/{campaign_id}"
+async def _campaign_action(api_key, action, campaign_id):
+    url = f"{BASE_URL}/{action}/{campaign_id}"
     headers = {"Authorization": f"Bearer {api_key}"}
-    response = requests.post(url, headers=headers)
-    return response.json()
+    _, data = await _post_and_invalidate(url, headers, None, f"{BASE_URL}/status/{campaign_id}")
+    return data
+
+def get_quota(api_key):
+    return run(fetch_quota(api_key))
+
+def get_campaign_status(api_key, campaign_id):
+    return run(fetch_campaign_status(api_key, campaign_id))
+
+def pause_campaign(api_key, campaign_id):
+    return run(_campaign_action(api_key, "pause", campaign_id))
 
 def resume_campaign(api_key, campaign_id):
-    url = f"{BASE_URL}/resume/{campaign_id}"
-    headers = {"Authorization": f"Bearer {api_key}"}
-    response = requests.post(url, headers=headers)
-    return response.json()
+    return run(_campaign_action(api_key, "resume", campaign_id))
 
 def cancel_campaign(api_key, campaign_id):
-    url = f"{BASE_URL}/cancel/{campaign_id}"
-    headers = {"Authorization": f"Bearer {api_key}"}
-    response = requests.post(url, headers=headers)
-    return response.json()
+    return run(_campaign_action(api_key, "cancel", campaign_id))
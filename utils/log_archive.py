@@ -0,0 +1,119 @@
+# utils/log_archive.py
+import os
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+ARCHIVE_DIR = os.path.join("archive", "email_logs")
+
+# SQLite's CURRENT_TIMESTAMP format, so cutoffs compare correctly as text
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Rows pulled from SQLite per step, so the first run over a huge table stays bounded
+CHUNK_ROWS = 50_000
+# Each month is compacted into this one file
+MONTH_FILE = "data.parquet"
+
+
+def _partition_dir(month: str) -> str:
+    return os.path.join(ARCHIVE_DIR, f"month={month}")
+
+
+def _compact_month(month: str):
+    """
+    Merge a month's part files (and any earlier data.parquet) into one file.
+    Memory is bounded by one month of logs, not the whole archive.
+    """
+    folder = _partition_dir(month)
+    files = sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".parquet"))
+    parts = [f for f in files if os.path.basename(f) != MONTH_FILE]
+    if not parts:
+        return
+
+    merged = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+    merged = merged.drop_duplicates(subset="id").sort_values("id", ignore_index=True)
+    target = os.path.join(folder, MONTH_FILE)
+    merged.to_parquet(f"{target}.tmp", index=False, compression="zstd")
+    os.replace(f"{target}.tmp", target)
+    # a crash between the replace and these removes only leaves duplicates, which readers drop by id
+    for f in parts:
+        os.remove(f)
+
+
+def archive_old_logs(db_file: str, max_age_days: int) -> int:
+    """
+    Move email_logs rows older than max_age_days into monthly Parquet partitions
+    under ARCHIVE_DIR (archive/email_logs/month=YYYY-MM/data.parquet).
+    - Rows are read in id order, CHUNK_ROWS at a time, and each chunk is only
+      deleted from SQLite after its part files are written.
+    - Every month with part files (this run's, or leftovers from an
+      interrupted one) is then compacted back into one file.
+    Returns the number of rows archived.
+    """
+    cutoff = (datetime.utcnow() - timedelta(days=max_age_days)).strftime(_TS_FORMAT)
+    archived = 0
+    conn = sqlite3.connect(db_file)
+    try:
+        while True:
+            chunk = pd.read_sql_query(
+                "SELECT * FROM email_logs WHERE timestamp < ? ORDER BY id LIMIT ?",
+                conn,
+                params=(cutoff, CHUNK_ROWS),
+            )
+            if chunk.empty:
+                break
+
+            first, last = int(chunk["id"].min()), int(chunk["id"].max())
+            months = pd.to_datetime(chunk["timestamp"]).dt.strftime("%Y-%m")
+            for month, part in chunk.groupby(months):
+                os.makedirs(_partition_dir(month), exist_ok=True)
+                path = os.path.join(_partition_dir(month), f"part-{first}-{last}.parquet")
+                part.to_parquet(path, index=False, compression="zstd")
+
+            # the chunk is exactly the old rows with ids in [first, last]
+            conn.execute(
+                "DELETE FROM email_logs WHERE timestamp < ? AND id BETWEEN ? AND ?",
+                (cutoff, first, last),
+            )
+            conn.commit()
+            archived += len(chunk)
+    finally:
+        conn.close()
+
+    if os.path.isdir(ARCHIVE_DIR):
+        for name in sorted(os.listdir(ARCHIVE_DIR)):
+            if name.startswith("month="):
+                _compact_month(name.partition("=")[2])
+    return archived
+
+
+def read_archived_logs(start: date | None = None, end: date | None = None) -> pd.DataFrame:
+    """
+    Read archived email logs between start and end (inclusive dates).
+    Only the month partitions overlapping the range are opened, and the
+    timestamp filter is pushed down to the Parquet reader.
+    """
+    if not os.path.isdir(ARCHIVE_DIR):
+        return pd.DataFrame()
+
+    first = start.strftime("%Y-%m") if start else None
+    last = end.strftime("%Y-%m") if end else None
+    files = []
+    for name in sorted(os.listdir(ARCHIVE_DIR)):
+        month = name.partition("=")[2]
+        if not month or (first and month < first) or (last and month > last):
+            continue
+        folder = os.path.join(ARCHIVE_DIR, name)
+        files.extend(os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.endswith(".parquet"))
+    if not files:
+        return pd.DataFrame()
+
+    filters = []
+    if start:
+        filters.append(("timestamp", ">=", start.strftime(_TS_FORMAT)))
+    if end:
+        filters.append(("timestamp", "<", (end + timedelta(days=1)).strftime(_TS_FORMAT)))
+
+    frames = [pd.read_parquet(f, filters=filters or None) for f in files]
+    # a retention run interrupted before its DELETE can leave rows archived twice
+    return pd.concat(frames, ignore_index=True).drop_duplicates(subset="id")
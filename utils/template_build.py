@@ -0,0 +1,160 @@
+# utils/template_build.py
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from premailer import Premailer
+
+BUILD_DIR = os.path.join("build", "templates")
+# Only images under this folder may be embedded into outgoing mail
+ASSETS_DIR = os.path.join("Assets", "Images")
+
+_IMG_SRC = re.compile(r'(<img\b[^>]*?\bsrc=)(["\'])([^"\']+)\2', re.IGNORECASE)
+_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+_PRE = re.compile(r"(<(pre|textarea)\b.*?</\2>)", re.DOTALL | re.IGNORECASE)
+_JINJA = re.compile(r"\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}", re.DOTALL)
+_REMOTE = ("http://", "https://", "data:", "cid:", "{{")
+
+# tpl_path -> (template mtime, image stats, compiled template), so reruns skip the disk
+_compiled = {}
+
+
+def _inline_css(html: str) -> str:
+    # templates already written with style="" attributes don't need a parse
+    if "<style" not in html.lower():
+        return html
+
+    # lxml URL-escapes href/src values ("{{ x }}" -> "{{%20x%20}}") and may
+    # reparse "<" inside {% %}, so swap Jinja expressions out while inlining
+    expressions = []
+
+    def protect(match):
+        expressions.append(match.group(0))
+        return f"__jinja{len(expressions) - 1}__"
+
+    html = Premailer(
+        _JINJA.sub(protect, html),
+        keep_style_tags=False,
+        remove_classes=False,
+        disable_validation=True,
+        allow_network=False,
+    ).transform()
+    return re.sub(r"__jinja(\d+)__", lambda m: expressions[int(m.group(1))], html)
+
+
+def _asset_path(src: str, base_dir: str) -> str | None:
+    """
+    Resolve an <img> src to a file inside ASSETS_DIR, trying it relative to
+    the template's folder and then to ASSETS_DIR itself. Anything that
+    resolves elsewhere (absolute paths, "..", symlinks out) gives None.
+    """
+    if src.startswith(_REMOTE):
+        return None
+    assets = os.path.realpath(ASSETS_DIR)
+    for root in (base_dir, ASSETS_DIR):
+        path = os.path.realpath(os.path.join(root, src))
+        if os.path.commonpath([assets, path]) == assets and os.path.isfile(path):
+            return path
+    return None
+
+
+def _image_stats(paths) -> tuple:
+    stats = []
+    for path in paths:
+        try:
+            info = os.stat(path)
+            stats.append((path, info.st_mtime_ns, info.st_size))
+        except OSError:
+            stats.append((path, None, None))
+    return tuple(stats)
+
+
+def _embed_images(html: str, base_dir: str) -> tuple:
+    """Swap <img> sources under ASSETS_DIR for content-hashed cid: references."""
+    images = {}
+
+    def repl(match):
+        path = _asset_path(match.group(3), base_dir)
+        if path is None:
+            return match.group(0)
+        with open(path, "rb") as f:
+            cid = hashlib.sha256(f.read()).hexdigest()[:16]
+        images[cid] = path
+        return f"{match.group(1)}{match.group(2)}cid:{cid}{match.group(2)}"
+
+    html = _IMG_SRC.sub(repl, html)
+    return html, sorted(images.items())
+
+
+def _minify(html: str) -> str:
+    # keep Outlook conditional comments and their "<!-->" / "<!--<![endif]-->" markers
+    html = _COMMENT.sub(lambda m: m.group(0) if "[if" in m.group(0) or "endif" in m.group(0) else "", html)
+    # whitespace inside <pre>/<textarea> is content, leave those blocks alone
+    parts = _PRE.split(html)
+    out = []
+    for i, part in enumerate(parts):
+        if i % 3 == 1:
+            out.append(part)
+        elif i % 3 == 0:
+            out.append(re.sub(r"\s+", " ", part))
+    return "".join(out).strip()
+
+
+def compile_template_source(html: str, base_dir: str = ".") -> dict:
+    """
+    Compile raw template HTML into {"html": ..., "images": [[cid, path], ...]}.
+    - <style> rules are inlined onto elements, then the HTML is minified.
+    - Images under ASSETS_DIR (src relative to base_dir or to ASSETS_DIR)
+      become cid: references to be sent as inline parts; any other src,
+      remote URLs and Jinja placeholders are left as-is.
+    Results are stored in BUILD_DIR keyed by a hash of the source, base_dir
+    and the size/mtime of every image it embeds.
+    """
+    base_dir = os.path.realpath(base_dir)
+    local = sorted({p for p in (_asset_path(m.group(3), base_dir) for m in _IMG_SRC.finditer(html)) if p})
+    fingerprint = json.dumps([html, base_dir, _image_stats(local)])
+    key = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+    artifact = os.path.join(BUILD_DIR, f"{key}.json")
+    if os.path.isfile(artifact):
+        with open(artifact, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    html, images = _embed_images(_inline_css(html), base_dir)
+    compiled = {"html": _minify(html), "images": [list(img) for img in images]}
+
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    tmp = f"{artifact}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(compiled, f)
+    os.replace(tmp, artifact)
+    return compiled
+
+
+def load_template(tpl_path: str) -> dict:
+    """
+    Compiled version of the template file at tpl_path, rebuilt when it or
+    any image it embeds changes. Image paths resolve from the template's folder.
+    """
+    mtime = os.path.getmtime(tpl_path)
+    hit = _compiled.get(tpl_path)
+    if hit and hit[0] == mtime and hit[1] == _image_stats(path for _, path in hit[2]["images"]):
+        return hit[2]
+
+    with open(tpl_path, "r", encoding="utf-8") as f:
+        compiled = compile_template_source(f.read(), os.path.dirname(tpl_path) or ".")
+    _compiled[tpl_path] = (mtime, _image_stats(path for _, path in compiled["images"]), compiled)
+    return compiled
+
+
+def read_images(images: list) -> list:
+    """Load compiled image references as (cid, bytes, maintype, subtype) tuples."""
+    out = []
+    for cid, path in images:
+        if _asset_path(path, ".") is None:
+            continue
+        maintype, _, subtype = (mimetypes.guess_type(path)[0] or "application/octet-stream").partition("/")
+        with open(path, "rb") as f:
+            out.append((cid, f.read(), maintype, subtype))
+    return out